@@ -50,6 +50,21 @@ class Config:
     DEVICE: str = os.getenv("DEVICE", "cpu")
     log.info("DEVICE selected", value=DEVICE)
 
+    # torch.compile the CLIP encoders (only applied on CUDA)
+    TORCH_COMPILE: bool = os.getenv("TORCH_COMPILE", "true").lower() in ("1", "true", "yes")
+    log.info("TORCH_COMPILE loaded", value=TORCH_COMPILE)
+
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", 128 if DEVICE == "cuda" else 32))
+    log.info("EMBED_BATCH_SIZE loaded", value=EMBED_BATCH_SIZE)
+
+    # Cached query-text embeddings (keyed on the normalised caption)
+    TEXT_EMBED_CACHE_SIZE: int = int(os.getenv("TEXT_EMBED_CACHE_SIZE", 2048))
+    log.info("TEXT_EMBED_CACHE_SIZE loaded", value=TEXT_EMBED_CACHE_SIZE)
+
+    # Threads decoding/preprocessing images ahead of the encoder
+    PREPROCESS_WORKERS: int = int(os.getenv("PREPROCESS_WORKERS", 4))
+    log.info("PREPROCESS_WORKERS loaded", value=PREPROCESS_WORKERS)
+
     # ------------------- QDRANT -------------------
     QDRANT_URL: str = os.getenv("QDRANT_URL")
     if QDRANT_URL:
@@ -63,12 +78,57 @@ class Config:
     else:
         log.warning("QDRANT_API_KEY missing in environment")
 
+    # gRPC (protobuf) transport instead of REST/JSON
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "true").lower() in ("1", "true", "yes")
+    log.info("QDRANT_PREFER_GRPC loaded", value=QDRANT_PREFER_GRPC)
+
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+    log.info("QDRANT_GRPC_PORT loaded", value=QDRANT_GRPC_PORT)
+
+    QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", 60))
+    log.info("QDRANT_TIMEOUT loaded", value=QDRANT_TIMEOUT)
+
     QDRANT_COLLECTION: str = os.getenv("QDRANT_COLLECTION", "semantic-image-search")
     log.info("QDRANT_COLLECTION loaded", value=QDRANT_COLLECTION)
 
     VECTOR_SIZE: int = int(os.getenv("VECTOR_SIZE", 512))
     log.info("VECTOR_SIZE loaded", value=VECTOR_SIZE)
 
+    # Storage datatype for new collections: "float32" or "float16" (halves vector storage)
+    VECTOR_DATATYPE: str = os.getenv("VECTOR_DATATYPE", "float32").lower()
+    log.info("VECTOR_DATATYPE loaded", value=VECTOR_DATATYPE)
+
+    QDRANT_UPLOAD_PARALLEL: int = int(os.getenv("QDRANT_UPLOAD_PARALLEL", min(8, os.cpu_count() or 1)))
+    log.info("QDRANT_UPLOAD_PARALLEL loaded", value=QDRANT_UPLOAD_PARALLEL)
+
+    QDRANT_UPLOAD_BATCH_SIZE: int = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", 256))
+    log.info("QDRANT_UPLOAD_BATCH_SIZE loaded", value=QDRANT_UPLOAD_BATCH_SIZE)
+
+    # HNSW indexing threshold restored after a bulk folder ingest when the
+    # collection's own value is unset or was left at 0
+    QDRANT_INDEXING_THRESHOLD: int = int(os.getenv("QDRANT_INDEXING_THRESHOLD", 20000))
+    log.info("QDRANT_INDEXING_THRESHOLD loaded", value=QDRANT_INDEXING_THRESHOLD)
+
+    # Optional optimizer overrides applied for bulk ingest on RAM-constrained hosts
+    QDRANT_BULK_MAX_SEGMENT_SIZE: int | None = (
+        int(os.getenv("QDRANT_BULK_MAX_SEGMENT_SIZE")) if os.getenv("QDRANT_BULK_MAX_SEGMENT_SIZE") else None
+    )
+    QDRANT_BULK_MEMMAP_THRESHOLD: int | None = (
+        int(os.getenv("QDRANT_BULK_MEMMAP_THRESHOLD")) if os.getenv("QDRANT_BULK_MEMMAP_THRESHOLD") else None
+    )
+    log.info(
+        "Bulk ingest optimizer overrides loaded",
+        max_segment_size=QDRANT_BULK_MAX_SEGMENT_SIZE,
+        memmap_threshold=QDRANT_BULK_MEMMAP_THRESHOLD,
+    )
+
+    # Search-time HNSW beam width and INT8 quantisation rescoring
+    QDRANT_HNSW_EF: int = int(os.getenv("QDRANT_HNSW_EF", 128))
+    log.info("QDRANT_HNSW_EF loaded", value=QDRANT_HNSW_EF)
+
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", 2.0))
+    log.info("QDRANT_QUANTIZATION_OVERSAMPLING loaded", value=QDRANT_QUANTIZATION_OVERSAMPLING)
+
     # ------------------- OPENAI -------------------
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     log.info("OPENAI_MODEL loaded", value=OPENAI_MODEL)
@@ -77,6 +137,9 @@ class Config:
     if not OPENAI_API_KEY:
         log.warning("OPENAI_API_KEY missing")
 
+    TRANSLATION_CACHE_SIZE: int = int(os.getenv("TRANSLATION_CACHE_SIZE", 4096))
+    log.info("TRANSLATION_CACHE_SIZE loaded", value=TRANSLATION_CACHE_SIZE)
+
 
 # ------------------------------------------------------------
 # 7) Final global config success log
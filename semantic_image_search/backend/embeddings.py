@@ -1,6 +1,14 @@
+import io
 import os
 import sys
-from typing import List
+import contextlib
+import threading
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
 from langchain_experimental.open_clip import OpenCLIPEmbeddings
 from semantic_image_search.backend.config import Config
 from semantic_image_search.backend.logger import GLOBAL_LOGGER as log
@@ -27,6 +35,18 @@ class EmbeddingLoader:
                 device=Config.DEVICE
             )
 
+            # OpenCLIPEmbeddings leaves the model on CPU in train mode and
+            # encodes one input at a time; we run inference on it directly.
+            self.device = Config.DEVICE
+            self.model = self.embedder.model.to(self.device).eval()
+
+            # One forward pass at a time: searches and background ingest share
+            # this model, and CUDA graphs from torch.compile aren't thread-safe
+            self._model_lock = threading.Lock()
+
+            if self.device == "cuda" and Config.TORCH_COMPILE:
+                self._compile()
+
             log.info("CLIP Embedding Model Loaded Successfully")
 
         except Exception as e:
@@ -38,17 +58,54 @@ class EmbeddingLoader:
             )
             raise SemanticImageSearchException("Error loading CLIP Embedding Model", e)
 
+    def _compile(self):
+        """Compile the image/text towers once; the first batches pay the compile cost."""
+        log.info("Compiling CLIP encoders with torch.compile", mode="reduce-overhead")
+
+        self.model.encode_image = torch.compile(
+            self.model.encode_image, mode="reduce-overhead", fullgraph=False
+        )
+        self.model.encode_text = torch.compile(
+            self.model.encode_text, mode="reduce-overhead", fullgraph=False
+        )
+
+    # ---------------------------------------------------------
+    # INFERENCE HELPERS
+    # ---------------------------------------------------------
+    def _inference(self) -> contextlib.ExitStack:
+        """No autograd bookkeeping, plus fp16 autocast on CUDA."""
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+
+        if self.device == "cuda":
+            stack.enter_context(torch.autocast(device_type="cuda", dtype=torch.float16))
+
+        return stack
+
+    @staticmethod
+    def _normalize(features: torch.Tensor) -> np.ndarray:
+        # Normalise in fp32 regardless of the autocast dtype
+        features = features.float()
+        features = features / features.norm(p=2, dim=-1, keepdim=True)
+        return np.ascontiguousarray(features.cpu().numpy(), dtype=np.float32)
+
     # ---------------------------------------------------------
     # TEXT → VECTOR
     # ---------------------------------------------------------
-    def embed_text(self, text: str) -> List[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         if not text:
             raise ValueError("Text cannot be empty for embedding")
 
         log.info("Embedding text", text_preview=text[:40])
 
         try:
-            vec = self.embedder.embed_query(text)
+            tokens = self.embedder.tokenizer([text]).to(self.device)
+
+            # Normalise (and copy to host) before releasing the lock: with
+            # CUDA graphs the output lives in a buffer the next call reuses
+            with self._model_lock, self._inference():
+                vec = self._normalize(self.model.encode_text(tokens))[0]
+
             log.info("Text embedding successful", vector_dim=len(vec))
             return vec
 
@@ -59,12 +116,11 @@ class EmbeddingLoader:
     # ---------------------------------------------------------
     # IMAGE → VECTOR
     # ---------------------------------------------------------
-    def embed_image(self, image_path: str) -> List[float]:
+    def embed_image(self, image_path: str) -> np.ndarray:
         log.info("Embedding single image", image=image_path)
 
         try:
-            vectors = self.embedder.embed_image([image_path])
-            vec = vectors[0]
+            vec = self.encode(self.load_and_preprocess([image_path]))[0]
 
             log.info("Single image embedding successful", vector_dim=len(vec))
             return vec
@@ -73,47 +129,167 @@ class EmbeddingLoader:
             log.error("Error embedding image", image=image_path, error=str(e))
             raise SemanticImageSearchException("Failed to embed image", e)
 
+    def embed_image_bytes(self, image_bytes: bytes) -> np.ndarray:
+        log.info("Embedding in-memory image", size_bytes=len(image_bytes))
+
+        try:
+            images = self._load_image(io.BytesIO(image_bytes)).unsqueeze(0)
+            vec = self.encode(images)[0]
+
+            log.info("In-memory image embedding successful", vector_dim=len(vec))
+            return vec
+
+        except Exception as e:
+            log.error("Error embedding in-memory image", size_bytes=len(image_bytes), error=str(e))
+            raise SemanticImageSearchException("Failed to embed image", e)
+
     # ---------------------------------------------------------
-    # BATCH IMAGE EMBEDDINGS
+    # IMAGE DECODE + PREPROCESS
     # ---------------------------------------------------------
-    def embed_images(self, image_paths: List[str]) -> List[List[float]]:
-        log.info("Embedding batch images", total_images=len(image_paths))
+    def _load_image(self, image_path) -> torch.Tensor:
+        # Accepts a filesystem path or a binary file-like object
+        with Image.open(image_path) as img:
+            return self.embedder.preprocess(img)
 
+    def load_and_preprocess(
+        self,
+        image_paths: List[str],
+        executor: Optional[Executor] = None,
+    ) -> torch.Tensor:
+        """
+        Decode and preprocess images into a single (N, C, H, W) tensor.
+        When an executor is given, images are decoded on its workers.
+        """
         try:
-            vectors = self.embedder.embed_image(image_paths)
-            log.info("Batch image embedding successful", total_images=len(vectors))
-            return vectors
+            mapper = executor.map if executor is not None else map
+            return self._stack(list(mapper(self._load_image, image_paths)))
 
         except Exception as e:
             log.error(
-                "Error embedding batch images",
+                "Error preprocessing batch images",
                 total_images=len(image_paths),
                 error=str(e)
             )
-            raise SemanticImageSearchException("Failed to embed image batch", e)
+            raise SemanticImageSearchException("Failed to preprocess image batch", e)
+
+    def load_and_preprocess_decodable(
+        self,
+        image_paths: List[str],
+        executor: Optional[Executor] = None,
+    ) -> Tuple[Optional[torch.Tensor], List[int]]:
+        """
+        Like load_and_preprocess, but an image that can't be decoded is logged
+        and left out instead of failing the batch. Returns the (M, C, H, W)
+        tensor of the decoded images (None if none decoded) and the indices
+        of the failed ones.
+        """
+        mapper = executor.map if executor is not None else map
+
+        images, failed = [], []
+        for index, image in enumerate(mapper(self._try_load_image, image_paths)):
+            if image is None:
+                failed.append(index)
+            else:
+                images.append(image)
+
+        return (self._stack(images) if images else None), failed
+
+    def _try_load_image(self, image_path: str) -> Optional[torch.Tensor]:
+        try:
+            return self._load_image(image_path)
+        except Exception as e:
+            log.warning("Skipping undecodable image", image=image_path, error=str(e))
+            return None
+
+    def _stack(self, images: List[torch.Tensor]) -> torch.Tensor:
+        images = torch.stack(images, dim=0)
+
+        # Pinned memory lets encode() copy to the GPU asynchronously
+        if self.device == "cuda":
+            images = images.pin_memory()
+
+        return images
+
+    # ---------------------------------------------------------
+    # PREPROCESSED TENSOR → VECTORS
+    # ---------------------------------------------------------
+    def encode(self, images: torch.Tensor) -> np.ndarray:
+        log.info("Encoding preprocessed images", total_images=len(images))
+
+        try:
+            images = images.to(self.device, non_blocking=True)
+
+            # See embed_text: the output buffer is only ours under the lock
+            with self._model_lock, self._inference():
+                vectors = self._normalize(self.model.encode_image(images))
+
+            log.info("Batch image encoding successful", total_images=len(vectors))
+            return vectors
+
+        except Exception as e:
+            log.error(
+                "Error encoding batch images",
+                total_images=len(images),
+                error=str(e)
+            )
+            raise SemanticImageSearchException("Failed to encode image batch", e)
+
+    # ---------------------------------------------------------
+    # BATCH IMAGE EMBEDDINGS
+    # ---------------------------------------------------------
+    def embed_images(self, image_paths: List[str]) -> np.ndarray:
+        log.info("Embedding batch images", total_images=len(image_paths))
+
+        return self.encode(self.load_and_preprocess(image_paths))
 
 
 # -------------------------------------------------------------
-# OPTIONAL: LAZY SINGLETON
+# LAZY SINGLETON
 # -------------------------------------------------------------
+# One CLIP model per process, shared by ImageSearchService and IndexService.
 _embedding_loader = None
+_embedding_loader_lock = threading.Lock()
 
 
 def get_loader() -> EmbeddingLoader:
     global _embedding_loader
     if _embedding_loader is None:
-        _embedding_loader = EmbeddingLoader()
+        with _embedding_loader_lock:
+            if _embedding_loader is None:
+                _embedding_loader = EmbeddingLoader()
     return _embedding_loader
 
 
 # Convenience API wrappers
-def embed_text(text: str) -> List[float]:
+def embed_text(text: str) -> np.ndarray:
     return get_loader().embed_text(text)
 
 
-def embed_single_image(image_path: str) -> List[float]:
+def embed_single_image(image_path: str) -> np.ndarray:
     return get_loader().embed_image(image_path)
 
 
-def embed_image_paths(image_paths: List[str]) -> List[List[float]]:
-    return get_loader().embed_images(image_paths)
\ No newline at end of file
+def embed_image_bytes(image_bytes: bytes) -> np.ndarray:
+    return get_loader().embed_image_bytes(image_bytes)
+
+
+def embed_image_paths(image_paths: List[str]) -> np.ndarray:
+    return get_loader().embed_images(image_paths)
+
+
+def preprocess_image_paths(
+    image_paths: List[str],
+    executor: Optional[Executor] = None,
+) -> torch.Tensor:
+    return get_loader().load_and_preprocess(image_paths, executor=executor)
+
+
+def preprocess_decodable_image_paths(
+    image_paths: List[str],
+    executor: Optional[Executor] = None,
+) -> Tuple[Optional[torch.Tensor], List[int]]:
+    return get_loader().load_and_preprocess_decodable(image_paths, executor=executor)
+
+
+def embed_preprocessed(images: torch.Tensor) -> np.ndarray:
+    return get_loader().encode(images)
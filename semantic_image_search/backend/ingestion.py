@@ -1,19 +1,191 @@
 import os
-from uuid import uuid4
+import time
+import queue
+import hashlib
+import collections
+import threading
+import contextlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Deque, Iterable, Iterator, Tuple
 
+import numpy as np
 from qdrant_client.http import models
 
 from semantic_image_search.backend.config import Config
 from semantic_image_search.backend.qdrant_manager import QdrantClientManager
-from semantic_image_search.backend.embeddings import embed_image_paths
+from semantic_image_search.backend.embeddings import (
+    embed_preprocessed,
+    preprocess_decodable_image_paths,
+)
 from semantic_image_search.backend.logger import GLOBAL_LOGGER as log
 from semantic_image_search.backend.exception.custom_exception import (
     SemanticImageSearchException,
 )
 
 
+# Lower-case suffixes (without the dot) accepted by folder indexing
+IMAGE_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "webp"})
+
+
+def _iter_images(root: str) -> Iterator[Tuple[str, str, str, os.stat_result]]:
+    """
+    Walk `root` with os.scandir and yield (image_path, filename, category, stat).
+
+    The category is the name of the directory containing the image.
+    Symlinked directories are not followed. Unreadable or vanished
+    directories and files are logged and skipped, like os.walk does.
+    """
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
+        category = os.path.basename(directory)
+
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            log.warning("Skipping unreadable directory", folder=directory, error=str(e))
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+
+                _, dot, suffix = entry.name.rpartition(".")
+                if not (dot and suffix.lower() in IMAGE_EXTENSIONS):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except OSError as e:
+                    log.warning("Skipping unreadable image", image=entry.path, error=str(e))
+                    continue
+
+                yield entry.path, entry.name, category, stat
+
+
+# Payload fields that tell whether a file changed since it was indexed
+_FILE_FIELDS = ("mtime", "size")
+
+
+def _file_fields(stat: os.stat_result) -> Dict[str, Any]:
+    return dict(zip(_FILE_FIELDS, (stat.st_mtime, stat.st_size)))
+
+
+def _point_id(image_path: str) -> int:
+    """
+    Deterministic 63-bit point id for an image path.
+    Re-indexing the same path overwrites its point instead of duplicating it.
+    """
+    digest = hashlib.blake2b(image_path.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & ((1 << 63) - 1)
+
+
+class _PrefetchingBatcher:
+    """
+    Groups (image_path, payload) records into batches and decodes the next
+    batches on background threads while the current one is being encoded.
+
+    Use as a context manager and iterate it to get
+    (preprocessed_tensor_batch, payloads) tuples.
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        records: Iterable[Tuple[str, Dict[str, Any]]],
+        batch_size: int,
+        max_workers: int = 4,
+        prefetch: int = 2,
+    ):
+        self._records = records
+        self._batch_size = batch_size
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="image-decode",
+        )
+        self._queue: queue.Queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._producer = threading.Thread(
+            target=self._produce,
+            name="image-prefetch",
+            daemon=True,
+        )
+
+    def __enter__(self):
+        self._producer.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._producer.join()
+        self._pool.shutdown(wait=True)
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+
+            if item is self._DONE:
+                return
+
+            if isinstance(item, BaseException):
+                raise item
+
+            yield item
+
+    def _put(self, item) -> bool:
+        # Wait for room in the queue, giving up once the consumer has stopped
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _emit(self, paths: List[str], payloads: List[Dict[str, Any]]) -> bool:
+        # Undecodable files are logged by the loader and dropped from the
+        # batch, so one corrupt image doesn't abort the whole ingest
+        images, failed = preprocess_decodable_image_paths(paths, executor=self._pool)
+
+        if images is None:
+            return True
+
+        if failed:
+            skipped = set(failed)
+            payloads = [payload for i, payload in enumerate(payloads) if i not in skipped]
+
+        return self._put((images, payloads))
+
+    def _produce(self):
+        try:
+            paths: List[str] = []
+            payloads: List[Dict[str, Any]] = []
+
+            for path, payload in self._records:
+                paths.append(path)
+                payloads.append(payload)
+
+                if len(paths) >= self._batch_size:
+                    if not self._emit(paths, payloads):
+                        return
+                    paths, payloads = [], []
+
+            if paths:
+                self._emit(paths, payloads)
+
+        except Exception as e:
+            self._put(e)
+
+        finally:
+            self._put(self._DONE)
+
+
 class IndexService:
     """
     Handles image indexing operations.
@@ -21,6 +193,7 @@ class IndexService:
     - Single image indexing
     - Folder batch indexing
     - Auto category inference
+    - Skips images already in the collection and unchanged on disk
     """
 
     VECTOR_NAME = "default"   # ✅ Must match Qdrant collection
@@ -38,6 +211,17 @@ class IndexService:
 
             self.collection = Config.QDRANT_COLLECTION
 
+            self._warn_on_legacy_ids()
+
+            # Single images waiting to be embedded as one batch
+            self._pending: List[Tuple[str, Dict[str, Any]]] = []
+            self._pending_lock = threading.Lock()
+
+            # Overlapping index_folder calls share one bulk-load window
+            self._bulk_lock = threading.Lock()
+            self._bulk_depth = 0
+            self._bulk_restore: Optional[models.OptimizersConfigDiff] = None
+
             log.info(
                 "IndexService initialized successfully",
                 collection=self.collection,
@@ -52,6 +236,34 @@ class IndexService:
                 e,
             )
 
+    def _warn_on_legacy_ids(self):
+        """
+        Collections built before ids were derived from the image path hold
+        uuid4 string ids; re-ingesting into them duplicates every image.
+        """
+
+        try:
+
+            points, _ = self.client.scroll(
+                collection_name=self.collection,
+                limit=1,
+                with_payload=False,
+                with_vectors=False,
+            )
+
+        except Exception as e:
+
+            log.warning("Could not check point id format", error=str(e))
+            return
+
+        if points and isinstance(points[0].id, str):
+            log.warning(
+                "Collection holds UUID point ids from an older version; "
+                "re-ingesting will duplicate images. Run clear_collection() "
+                "once and ingest again.",
+                collection=self.collection,
+            )
+
     # ---------------------------------------------------------
     # SINGLE IMAGE INDEX
     # ---------------------------------------------------------
@@ -59,35 +271,39 @@ class IndexService:
         self,
         image_path: str,
         category: Optional[str] = None,
+        flush_now: bool = True,
     ):
+        """
+        Index one image. With flush_now=False the image is queued and
+        embedded together with later ones once EMBED_BATCH_SIZE images are
+        pending or flush() is called.
+        """
 
         log.info(
             "Indexing single image",
             image=image_path,
             category=category,
+            flush_now=flush_now,
         )
 
         try:
 
-            vec = embed_image_paths([image_path])[0]
-
             payload = {
                 "filename": os.path.basename(image_path),
                 "path": image_path,
                 "category": category,
+                **_file_fields(os.stat(image_path)),
             }
 
-            point = models.PointStruct(
-                id=str(uuid4()),
-                vector={self.VECTOR_NAME: vec},   # ✅ NAMED VECTOR
-                payload=payload,
-            )
+            with self._pending_lock:
 
-            self.client.upsert(
-                collection_name=self.collection,
-                points=[point],
-                wait=True,
-            )
+                self._pending.append((image_path, payload))
+
+                if not flush_now and len(self._pending) < Config.EMBED_BATCH_SIZE:
+                    log.info("Single image queued", pending=len(self._pending))
+                    return
+
+                self._flush_pending()
 
             log.info("Single image indexed successfully")
 
@@ -104,128 +320,474 @@ class IndexService:
                 e,
             )
 
+    def flush(self):
+        """Embed and upload any images queued by index_image(flush_now=False)."""
+
+        try:
+
+            with self._pending_lock:
+                self._flush_pending()
+
+        except Exception as e:
+
+            log.error("Flushing pending images failed", error=str(e))
+
+            raise SemanticImageSearchException(
+                "Failed to flush pending images",
+                e,
+            )
+
+    def _flush_pending(self):
+        # Caller must hold self._pending_lock. The queue is only cleared once
+        # the batch is uploaded, so encode/upload failures keep it for a retry.
+
+        if not self._pending:
+            return
+
+        # One undecodable file must not drop the rest of the queue: each
+        # image is decoded once, the bad ones are reported and the rest indexed
+        images, failed_indices = preprocess_decodable_image_paths(
+            [path for path, _ in self._pending]
+        )
+
+        skipped = set(failed_indices)
+        failed = [path for i, (path, _) in enumerate(self._pending) if i in skipped]
+
+        if images is not None:
+            self._index_batch(
+                images,
+                [payload for i, (_, payload) in enumerate(self._pending) if i not in skipped],
+            )
+
+        self._pending = []
+
+        if failed:
+            raise SemanticImageSearchException(
+                f"Failed to decode {len(failed)} queued image(s): {', '.join(failed)}"
+            )
+
     # ---------------------------------------------------------
     # FOLDER INDEXING
     # ---------------------------------------------------------
     def index_folder(
         self,
         root_folder: str | os.PathLike,
+        skip_existing: bool = True,
     ):
+        """
+        Index every image under `root_folder`. With skip_existing (default)
+        images already in the collection are not embedded again unless their
+        mtime or size changed.
+        """
 
         root_folder = str(root_folder)
 
         log.info(
             "Starting folder indexing",
             folder=root_folder,
+            skip_existing=skip_existing,
         )
 
-        extensions = (".jpg", ".jpeg", ".png", ".webp")
+        # Images are batched across the whole walk so that every embed/upload
+        # call runs on a full batch, not one folder at a time. Decoding of the
+        # next batches overlaps with encoding of the current one.
+        records = (
+            (
+                img_path,
+                {
+                    "filename": filename,
+                    "path": img_path,
+                    "category": category,
+                    **_file_fields(stat),
+                },
+            )
+            for img_path, filename, category, stat in _iter_images(root_folder)
+        )
+
+        if skip_existing:
+            records = self._skip_existing(records)
+
+        total_indexed = 0
 
         try:
 
-            for dirpath, _, files in os.walk(root_folder):
+            # Skip HNSW rebuilds while the bulk load is running
+            with self._bulk_load(), _PrefetchingBatcher(
+                records,
+                batch_size=Config.EMBED_BATCH_SIZE,
+                max_workers=Config.PREPROCESS_WORKERS,
+            ) as batches, ThreadPoolExecutor(
+                max_workers=Config.QDRANT_UPLOAD_PARALLEL,
+                thread_name_prefix="qdrant-upload",
+            ) as uploader:
+
+                # Each encoded batch goes up as columnar upserts on
+                # the upload pool, so uploads overlap with encoding the next one
+                in_flight: Deque[Future] = collections.deque()
+
+                for images, payloads in batches:
+
+                    log.info(
+                        "Embedding batch",
+                        total_images=len(payloads),
+                    )
 
-                category = os.path.basename(dirpath)
+                    vectors = embed_preprocessed(images)
+                    ids = [_point_id(payload["path"]) for payload in payloads]
 
-                image_paths: List[str] = []
-                payloads: List[Dict[str, Any]] = []
+                    in_flight.append(uploader.submit(self._upload, ids, vectors, payloads))
 
-                for f in files:
+                    # Bounds the encoded batches held in memory and surfaces
+                    # upload errors without waiting for the whole walk
+                    while len(in_flight) > Config.QDRANT_UPLOAD_PARALLEL:
+                        total_indexed += in_flight.popleft().result()
 
-                    if not f.lower().endswith(extensions):
-                        continue
+                    log.info(
+                        "Batch embedded successfully",
+                        embedded=len(ids),
+                        total_indexed=total_indexed,
+                    )
 
-                    img_path = os.path.join(dirpath, f)
+                while in_flight:
+                    total_indexed += in_flight.popleft().result()
 
-                    image_paths.append(img_path)
+            log.info(
+                "Folder indexed successfully",
+                folder=root_folder,
+                indexed=total_indexed,
+            )
 
-                    payloads.append(
-                        {
-                            "filename": os.path.basename(img_path),
-                            "path": img_path,
-                            "category": category,
-                        }
-                    )
+        except Exception as e:
 
-                if not image_paths:
-                    continue
+            log.error(
+                "Folder indexing failed",
+                folder=root_folder,
+                error=str(e),
+            )
 
-                log.info(
-                    "Embedding batch",
-                    folder=dirpath,
-                    total_images=len(image_paths),
-                    category=category,
+            raise SemanticImageSearchException(
+                "Failed to index folder",
+                e,
+            )
+
+    # ---------------------------------------------------------
+    # BATCH EMBED + UPLOAD (single-image queue)
+    # ---------------------------------------------------------
+    def _index_batch(
+        self,
+        images,
+        payloads: List[Dict[str, Any]],
+    ) -> int:
+        """Encode a preprocessed image batch and upload it. Returns the point count."""
+
+        vectors = embed_preprocessed(images)
+        ids = [_point_id(payload["path"]) for payload in payloads]
+
+        return self._upload(ids, vectors, payloads)
+
+    # ---------------------------------------------------------
+    # EXISTING-POINT CHECK
+    # ---------------------------------------------------------
+    def _skip_existing(
+        self,
+        records: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Drop records whose point is already stored with the same mtime and
+        size. The collection is checked one batch of ids at a time, so a
+        reset or dropped collection is always reflected in the next ingest,
+        and an image edited or replaced at the same path is re-embedded.
+        """
+
+        chunk: List[Tuple[str, Dict[str, Any]]] = []
+
+        for record in records:
+
+            chunk.append(record)
+
+            if len(chunk) >= Config.EMBED_BATCH_SIZE:
+                yield from self._drop_existing(chunk)
+                chunk = []
+
+        if chunk:
+            yield from self._drop_existing(chunk)
+
+    def _drop_existing(
+        self,
+        chunk: List[Tuple[str, Dict[str, Any]]],
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+
+        ids = [_point_id(img_path) for img_path, _ in chunk]
+
+        # Points indexed before mtime/size were stored never match, so they
+        # are re-embedded once
+        stored = {
+            point.id: tuple(map((point.payload or {}).get, _FILE_FIELDS))
+            for point in self.client.retrieve(
+                collection_name=self.collection,
+                ids=ids,
+                with_payload=list(_FILE_FIELDS),
+                with_vectors=False,
+            )
+        }
+
+        return [
+            (img_path, payload)
+            for point_id, (img_path, payload) in zip(ids, chunk)
+            if stored.get(point_id) != tuple(map(payload.get, _FILE_FIELDS))
+        ]
+
+    # ---------------------------------------------------------
+    # QDRANT HELPERS
+    # ---------------------------------------------------------
+    def _upload(
+        self,
+        ids: List[int],
+        vectors: np.ndarray,
+        payloads: List[Dict[str, Any]],
+    ) -> int:
+        """
+        Upload points in batches of QDRANT_UPLOAD_BATCH_SIZE without waiting.
+        `vectors` is the (N, VECTOR_SIZE) float32 array from encode(), passed
+        to the client as-is rather than converted to Python floats here.
+        Returns the point count.
+        """
+
+        self.client.upload_collection(
+            collection_name=self.collection,
+            vectors={self.VECTOR_NAME: vectors},   # ✅ NAMED VECTOR
+            payload=payloads,
+            ids=ids,
+            batch_size=Config.QDRANT_UPLOAD_BATCH_SIZE,
+            max_retries=3,
+            wait=False,
+        )
+
+        return len(ids)
+
+    @contextlib.contextmanager
+    def _bulk_load(self):
+        """
+        Disable HNSW indexing (indexing_threshold=0), plus any configured
+        bulk-only optimizer overrides, for a bulk ingest. Overlapping bulk
+        loads share one window: the first applies the settings and the last
+        to finish restores the collection's previous values.
+        """
+
+        with self._bulk_lock:
+            if self._bulk_depth == 0:
+                self._bulk_restore = self._begin_bulk_load()
+            self._bulk_depth += 1
+
+        try:
+            yield
+
+        finally:
+            with self._bulk_lock:
+                self._bulk_depth -= 1
+                if self._bulk_depth == 0:
+                    restore, self._bulk_restore = self._bulk_restore, None
+                    self._restore_optimizers(restore)
+
+    def _begin_bulk_load(self) -> models.OptimizersConfigDiff:
+        """Apply the bulk-load optimizer settings and return the diff that undoes them."""
+
+        current = self._get_optimizer_config()
+
+        # 0 means an earlier bulk load never restored it
+        threshold = current.indexing_threshold if current is not None else None
+
+        bulk: Dict[str, Any] = {"indexing_threshold": 0}
+        restore: Dict[str, Any] = {
+            "indexing_threshold": threshold or Config.QDRANT_INDEXING_THRESHOLD,
+        }
+
+        # Overrides are only applied when the current value is known, since
+        # an unset (None) field in a diff can't put it back
+        overrides = {
+            "max_segment_size": Config.QDRANT_BULK_MAX_SEGMENT_SIZE,
+            "memmap_threshold": Config.QDRANT_BULK_MEMMAP_THRESHOLD,
+        }
+
+        for field, value in overrides.items():
+
+            if value is None:
+                continue
+
+            previous = getattr(current, field, None) if current is not None else None
+
+            if previous is None:
+                log.warning(
+                    "Skipping bulk optimizer override, current value unknown",
+                    field=field,
                 )
+                continue
 
-                vectors = embed_image_paths(image_paths)
+            bulk[field] = value
+            restore[field] = previous
 
-                points = [
+        self._update_optimizers(models.OptimizersConfigDiff(**bulk))
 
-                    models.PointStruct(
-                        id=str(uuid4()),
-                        vector={self.VECTOR_NAME: vector},   # ✅ NAMED VECTOR FIX
-                        payload=payload,
-                    )
+        return models.OptimizersConfigDiff(**restore)
 
-                    for vector, payload in zip(
-                        vectors,
-                        payloads,
-                    )
-                ]
+    def _get_optimizer_config(self) -> Optional[models.OptimizersConfig]:
+
+        try:
+
+            info = self.client.get_collection(collection_name=self.collection)
+            return info.config.optimizer_config
+
+        except Exception as e:
+
+            log.warning(
+                "Failed to read optimizer config",
+                collection=self.collection,
+                error=str(e),
+            )
+            return None
+
+    def _update_optimizers(self, optimizers_config: models.OptimizersConfigDiff):
+
+        try:
+
+            self.client.update_collection(
+                collection_name=self.collection,
+                optimizers_config=optimizers_config,
+            )
+
+            log.info(
+                "Optimizer config updated",
+                collection=self.collection,
+                **optimizers_config.model_dump(exclude_none=True),
+            )
 
-                self.client.upsert(
+        except Exception as e:
+
+            # Not fatal: ingest still works, only slower
+            log.warning(
+                "Failed to update optimizer config",
+                indexing_threshold=optimizers_config.indexing_threshold,
+                error=str(e),
+            )
+
+    def _restore_optimizers(
+        self,
+        optimizers_config: models.OptimizersConfigDiff,
+        attempts: int = 3,
+    ):
+        """
+        Put back the settings a bulk load changed. Unlike _update_optimizers
+        this retries and then raises: a collection left at indexing_threshold=0
+        never builds its HNSW index and silently falls back to brute-force search.
+        """
+
+        for attempt in range(1, attempts + 1):
+
+            try:
+
+                self.client.update_collection(
                     collection_name=self.collection,
-                    points=points,
-                    wait=True,
+                    optimizers_config=optimizers_config,
                 )
 
                 log.info(
-                    "Folder indexed successfully",
-                    folder=dirpath,
-                    indexed=len(points),
+                    "Optimizer config restored",
+                    collection=self.collection,
+                    **optimizers_config.model_dump(exclude_none=True),
+                )
+                return
+
+            except Exception as e:
+
+                if attempt == attempts:
+
+                    log.error(
+                        "Failed to restore optimizer config; HNSW indexing stays disabled",
+                        collection=self.collection,
+                        **optimizers_config.model_dump(exclude_none=True),
+                        error=str(e),
+                    )
+
+                    raise SemanticImageSearchException(
+                        f"Failed to restore optimizer config of collection {self.collection}",
+                        e,
+                    )
+
+                log.warning(
+                    "Restoring optimizer config failed, retrying",
+                    attempt=attempt,
+                    error=str(e),
                 )
+                time.sleep(2 ** attempt)
+
+    # ---------------------------------------------------------
+    # CLEAR COLLECTION
+    # ---------------------------------------------------------
+    def clear_collection(self):
+        """Drop and recreate the collection (no per-point deletes)."""
+
+        log.warning(
+            "Clearing Qdrant collection",
+            collection=self.collection,
+        )
+
+        try:
+
+            self.client.delete_collection(collection_name=self.collection)
+
+            QdrantClientManager.ensure_collection()
+
+            log.info("Collection cleared successfully")
 
         except Exception as e:
 
             log.error(
-                "Folder indexing failed",
-                folder=root_folder,
+                "Collection clear failed",
                 error=str(e),
             )
 
             raise SemanticImageSearchException(
-                "Failed to index folder",
+                "Failed to clear collection",
                 e,
             )
 
-    # ---------------------------------------------------------
-    # CLEAR COLLECTION
-    # ---------------------------------------------------------
-    def clear_collection(self):
+    def clear_category(self, category: str):
+        """Delete every point whose payload category equals `category`."""
 
         log.warning(
-            "Clearing Qdrant collection",
+            "Clearing category from Qdrant collection",
             collection=self.collection,
+            category=category,
         )
 
         try:
 
             self.client.delete(
                 collection_name=self.collection,
-                filter=models.Filter(must=[]),
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[
+                            models.FieldCondition(
+                                key="category",
+                                match=models.MatchValue(value=category),
+                            )
+                        ]
+                    )
+                ),
             )
 
-            log.info("Collection cleared successfully")
+            log.info("Category cleared successfully", category=category)
 
         except Exception as e:
 
             log.error(
-                "Collection clear failed",
+                "Category clear failed",
+                category=category,
                 error=str(e),
             )
 
             raise SemanticImageSearchException(
-                "Failed to clear collection",
+                "Failed to clear category",
                 e,
             )
 
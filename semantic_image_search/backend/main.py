@@ -1,14 +1,24 @@
-import shutil
+import uuid
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any
 
 from fastapi import FastAPI, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
 from semantic_image_search.backend.config import Config
-from semantic_image_search.backend.query_translator import translate_query
+from semantic_image_search.backend.query_translator import (
+    translate_query,
+    get_translator,
+    resolve_translation_token,
+)
 from semantic_image_search.backend.ingestion import IndexService
 from semantic_image_search.backend.retriever import ImageSearchService
+from semantic_image_search.backend.embeddings import get_loader
 from semantic_image_search.backend.logger import GLOBAL_LOGGER as log
 from semantic_image_search.backend.exception.custom_exception import SemanticImageSearchException
 
@@ -38,21 +48,80 @@ index_service = None
 # and reading configuration all take time and memory. So we create them once and reuse 
 # them instead of creating them again for every request.”
 
+# Search requests run their CLIP + Qdrant work on one dedicated thread so the
+# event loop keeps serving other requests. Background ingest encodes on its
+# own thread; EmbeddingLoader serialises the actual model calls.
+_ENCODE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clip-encode")
+
+# Background ingest jobs: job_id -> {"status", "folder", "error"}
+ingest_jobs: Dict[str, Dict[str, Any]] = {}
+_JOBS_LOCK = threading.Lock()
+
+# Finished jobs kept for /ingest/{job_id}; older ones are dropped
+_MAX_FINISHED_JOBS = 100
+
+# Ingest jobs run one at a time on a single worker; later ones wait in its
+# queue as "queued" without holding a thread
+_INGEST_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
+
+async def _run_encode(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ENCODE_POOL, functools.partial(func, *args, **kwargs))
+
+
+# Payload fields returned for each search hit; missing fields come back as None
+_RESULT_FIELDS = ("filename", "path", "category")
+_RESPONSE_KEYS = (*_RESULT_FIELDS, "score")
+
+
+def _format_points(points) -> list:
+    return [
+        dict(zip(_RESPONSE_KEYS, (*map(p.payload.get, _RESULT_FIELDS), p.score)))
+        for p in points
+    ]
+
 
 @app.on_event("startup")
 def init_services():
     global search_service, index_service
     search_service = ImageSearchService()
     index_service = IndexService()
+
+    # Load the shared CLIP model now rather than on the first request
+    get_loader()
+
+    # Build the translator up front; the API still starts if OpenAI is misconfigured
+    try:
+        get_translator()
+    except Exception as e:
+        log.warning("QueryTranslator warm-up failed", error=str(e))
+
     log.info("Services initialized successfully")
 
 
+@app.on_event("shutdown")
+def shutdown_services():
+    # Ingest jobs that haven't started are dropped
+    _INGEST_POOL.shutdown(wait=False, cancel_futures=True)
+
+    # Index images still queued by index_image(flush_now=False)
+    if index_service is None:
+        return
+
+    try:
+        index_service.flush()
+    except Exception as e:
+        log.error("Flushing pending images on shutdown failed", error=str(e))
+
+
 # ---------------------------------------------------------
 # INGEST ENDPOINT
 # ---------------------------------------------------------
-@app.post("/ingest")
-def ingest_images(
+@app.post("/ingest", status_code=202)
+async def ingest_images(
     folder_path: Optional[str] = Query(None),
+    reindex: bool = False,
 ):
     folder = Path(folder_path or Config.IMAGES_ROOT)
 
@@ -62,18 +131,63 @@ def ingest_images(
             content={"error": f"Invalid folder: {folder}"}
         )
 
+    job_id = uuid.uuid4().hex
+    with _JOBS_LOCK:
+        ingest_jobs[job_id] = {"status": "queued", "folder": str(folder), "error": None}
+
+    _INGEST_POOL.submit(_run_ingest, job_id, str(folder), reindex)
+
+    log.info("Ingest job queued", job_id=job_id, folder=str(folder))
+    return {"message": f"Ingesting images from {folder}", "job_id": job_id}
+
+
+def _run_ingest(job_id: str, folder: str, reindex: bool = False):
+    # Runs on the ingest worker after the 202 response is sent
+    _update_job(job_id, status="running")
+
     try:
-        index_service.index_folder(str(folder))
-        return {"message": f"Ingested images from {folder}"}
+        # reindex re-embeds images that earlier runs already ingested
+        index_service.index_folder(folder, skip_existing=not reindex)
+        _update_job(job_id, status="completed")
+        log.info("Ingest job completed", job_id=job_id, folder=folder)
 
     except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"error": str(e)}
-        )
+        _update_job(job_id, status="failed", error=str(e))
+        log.error("Ingest job failed", job_id=job_id, folder=folder, error=str(e))
+
+    _prune_jobs()
+
+
+def _update_job(job_id: str, **fields):
+    with _JOBS_LOCK:
+        ingest_jobs[job_id].update(fields)
+
+
+def _prune_jobs():
+    with _JOBS_LOCK:
+        finished = [
+            job_id for job_id, job in ingest_jobs.items()
+            if job["status"] in ("completed", "failed")
+        ]
+
+        # Dicts keep insertion order, so the oldest finished jobs come first
+        for job_id in finished[:-_MAX_FINISHED_JOBS]:
+            del ingest_jobs[job_id]
+
+
+@app.get("/ingest/{job_id}")
+async def ingest_status(job_id: str):
+    with _JOBS_LOCK:
+        job = dict(ingest_jobs.get(job_id) or {})
+
+    if not job:
+        return JSONResponse(status_code=404, content={"error": f"Unknown ingest job: {job_id}"})
+
+    return {"job_id": job_id, **job}
 
 # The API tells the backend to process images that already exist in a folder.
-# It checks the folder, runs ingestion, and reports success or failure.
+# It checks the folder, starts ingestion in the background and returns a job id
+# whose progress can be polled at /ingest/{job_id}.
 
 # ---------------------------------------------------------
 # TRANSLATE ENDPOINT
@@ -84,49 +198,60 @@ def translate(q: str):
 
     try:
         translated = translate_query(q)
+        token = get_translator().issue_token(translated)
         log.info("Query translated", original=q, translated=translated)
-        return {"input": q, "translated": translated}
+        return {"input": q, "translated": translated, "token": token}
 
     except Exception as e:
         log.error("Translation failed", query=q, error=str(e))
         return JSONResponse(status_code=500, content={"error": str(e), "type": type(e).__name__})
 
 # The API receives a text query, translates it, and returns the result, with logging and error handling included.
+# The returned token can be passed to /search-text as translated_token to skip translating again.
 # ---------------------------------------------------------
 # TEXT SEARCH ENDPOINT
 # ---------------------------------------------------------
 @app.get("/search-text")
-def search_text_endpoint(
+async def search_text_endpoint(
     q: str,
     k: int = 5,
     category: Optional[str] = None,
     save_results: bool = False,
+    pretranslated: bool = False,
+    translated_token: Optional[str] = None,
 ):
     log.info("Text search request received", query=q, top_k=k, category=category)
 
     try:
-        translated = translate_query(q)
+        # Reuse a translation the client already got from /translate. Off the
+        # event loop: the first call may still have to build the OpenAI client
+        translated = (
+            await run_in_threadpool(resolve_translation_token, translated_token)
+            if translated_token
+            else None
+        )
+
+        if translated is None:
+            if pretranslated:
+                translated = q
+            else:
+                translated = await run_in_threadpool(translate_query, q)
+
         log.info("Query translated for text search", translated=translated)
 
         metadata_filter = {"category": category} if category else None
 
-        results = search_service.search_by_text(translated, k=k, metadata_filter=metadata_filter)
+        results = await _run_encode(
+            search_service.search_by_text, translated, k=k, metadata_filter=metadata_filter
+        )
 
         log.info("Text search completed", total_results=len(results.points))
 
-        resp = [
-            {
-                "filename": p.payload.get("filename"),
-                "path": p.payload.get("path"),
-                "category": p.payload.get("category"),
-                "score": p.score,
-            }
-            for p in results.points
-        ]
+        resp = _format_points(results.points)
 
         folder = None
         if save_results and results.points:
-            folder = search_service.save_results(results)
+            folder = await run_in_threadpool(search_service.save_results, results)
             log.info("Search results saved locally", folder=folder)
 
         return {"query": q, "translated": translated, "k": k, "saved_folder": folder, "results": resp}
@@ -135,13 +260,14 @@ def search_text_endpoint(
         log.error("Text search failed", query=q, error=str(e))
         return JSONResponse(status_code=500, content={"error": str(e), "type": type(e).__name__})
 
+
 # Category is an optional backend filter; if the UI doesn’t send it, the search runs across all data without filtering.
 # The API performs a multilingual text search on indexed data, returns the top results, and safely handles logging and errors.
 # ---------------------------------------------------------
 # IMAGE SEARCH ENDPOINT
 # ---------------------------------------------------------
 @app.post("/search-image")
-def search_image_endpoint(
+async def search_image_endpoint(
     file: UploadFile = File(...),
     k: int = 5,
     category: Optional[str] = None,
@@ -153,34 +279,32 @@ def search_image_endpoint(
         if not file.content_type.startswith("image/"):
             return JSONResponse(status_code=400, content={"error": "Only image files allowed"})
 
-        Config.QUERY_IMAGE_ROOT.mkdir(parents=True, exist_ok=True)
-        query_path = Config.QUERY_IMAGE_ROOT / file.filename
+        # Search straight from memory; the upload only touches disk when results are saved
+        image_bytes = await file.read()
 
-        with query_path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
+        query_path = None
+        if save_results:
+            # Unique name so concurrent uploads called e.g. "query.png" don't collide
+            Config.QUERY_IMAGE_ROOT.mkdir(parents=True, exist_ok=True)
+            query_path = Config.QUERY_IMAGE_ROOT / f"{uuid.uuid4().hex}{Path(file.filename or '').suffix}"
 
-        log.info("Uploaded query image saved", path=str(query_path))
+            await run_in_threadpool(query_path.write_bytes, image_bytes)
+            log.info("Uploaded query image saved", path=str(query_path))
 
         metadata_filter = {"category": category} if category else None
 
-        results = search_service.search_by_image(str(query_path), k=k, metadata_filter=metadata_filter)
+        results = await _run_encode(
+            search_service.search_by_image_bytes, image_bytes, k=k, metadata_filter=metadata_filter
+        )
 
-        resp = [
-            {
-                "filename": p.payload.get("filename"),
-                "path": p.payload.get("path"),
-                "category": p.payload.get("category"),
-                "score": p.score,
-            }
-            for p in results.points
-        ]
+        resp = _format_points(results.points)
 
         folder = None
         if save_results and results.points:
-            folder = search_service.save_results(results)
+            folder = await run_in_threadpool(search_service.save_results, results)
             log.info("Search results saved locally", folder=folder)
 
-        return {"query_image": str(query_path), "k": k, "saved_folder": folder, "results": resp}
+        return {"query_image": str(query_path) if query_path else None, "k": k, "saved_folder": folder, "results": resp}
 
     except Exception as e:
         log.error("Image search failed", filename=file.filename, error=str(e))
@@ -190,7 +314,7 @@ def search_image_endpoint(
     
     
     # This endpoint takes a user’s text query, translates it, and searches previously ingested data with optional category filtering. It formats the matched results, optionally saves them, and returns the response with proper logging and error handling.
-    # This endpoint accepts an image uploaded by the user, validates and saves it, and performs a similarity search on previously ingested data. It returns the top matching results with optional category filtering, saving, and proper logging and error handling.
+    # This endpoint accepts an image uploaded by the user, validates it (saving it only when save_results is set), and performs a similarity search on previously ingested data. It returns the top matching results with optional category filtering, saving, and proper logging and error handling.
     
     # uvicorn semantic_image_search.backend.main:app --reload
     
@@ -291,6 +415,8 @@ def search_image_endpoint(
 # 4) Run the API (keep this terminal open)
 
 # uvicorn semantic_image_search.backend.main:app --reload --port 8000
+# Every worker process loads its own CLIP model: keep --workers 1 when
+# DEVICE=cuda (one GPU can't be shared safely); use --workers N only on CPU.
 
 # C) Verify + test
 # 5) In a second terminal: check docs
@@ -26,13 +26,18 @@ class QdrantClientManager:
             log.info(
                 "Initializing Qdrant client",
                 url=Config.QDRANT_URL,
-                using_api_key=bool(Config.QDRANT_API_KEY)
+                using_api_key=bool(Config.QDRANT_API_KEY),
+                prefer_grpc=Config.QDRANT_PREFER_GRPC,
+                grpc_port=Config.QDRANT_GRPC_PORT,
             )
 
             try:
                 cls._client = QdrantClient(
                     url=Config.QDRANT_URL,
                     api_key=Config.QDRANT_API_KEY,
+                    prefer_grpc=Config.QDRANT_PREFER_GRPC,
+                    grpc_port=Config.QDRANT_GRPC_PORT,
+                    timeout=Config.QDRANT_TIMEOUT,
                 )
                 log.info("Qdrant client initialized successfully")
 
@@ -61,6 +66,7 @@ class QdrantClientManager:
                     collection=Config.QDRANT_COLLECTION,
                     vector_size=Config.VECTOR_SIZE,
                     distance="COSINE",
+                    datatype=Config.VECTOR_DATATYPE,
                 )
 
                 client.create_collection(
@@ -70,6 +76,7 @@ class QdrantClientManager:
                             size=Config.VECTOR_SIZE,
                             distance=models.Distance.COSINE,
                             on_disk=True,   # important for large datasets
+                            datatype=models.Datatype(Config.VECTOR_DATATYPE),
                         )
                     },
                     quantization_config=models.ScalarQuantization(
@@ -89,10 +96,29 @@ class QdrantClientManager:
                     collection=Config.QDRANT_COLLECTION,
                 )
 
+            cls._ensure_category_index(client)
+
         except Exception as e:
             log.error("Failed to ensure Qdrant collection", error=str(e))
             raise SemanticImageSearchException("Failed to ensure Qdrant collection", e)
 
+    @classmethod
+    def _ensure_category_index(cls, client: QdrantClient):
+        """Keyword index on `category` so filtered searches/deletes don't scan payloads"""
+
+        schema = client.get_collection(Config.QDRANT_COLLECTION).payload_schema or {}
+
+        if "category" in schema:
+            return
+
+        log.info("Creating payload index", collection=Config.QDRANT_COLLECTION, field="category")
+
+        client.create_payload_index(
+            collection_name=Config.QDRANT_COLLECTION,
+            field_name="category",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
 
 if __name__ == "__main__":
     client = QdrantClientManager.get_client()
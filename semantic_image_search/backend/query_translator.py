@@ -1,17 +1,60 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
+import re
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional
+from openai import OpenAI
 from semantic_image_search.backend.config import Config
 from semantic_image_search.backend.logger import GLOBAL_LOGGER as log
 from semantic_image_search.backend.exception.custom_exception import SemanticImageSearchException
 
 
+# Chat-style phrases that mark a query as needing an LLM rewrite
+CHAT_PATTERNS = (
+    "show me",
+    "please",
+    "give me",
+    "can you",
+    "i want",
+    "find me",
+    "could you",
+)
+
+# One alternation matched in a single pass over the query
+_CHAT_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, CHAT_PATTERNS)) + r")\b"
+)
+
+
+PROMPT_TEMPLATE_STR = """
+You are an expert at rewriting queries for the CLIP image–text model.
+
+Goal:
+Rewrite the user query into a short, concrete, descriptive image caption.
+The rewritten query must maximize CLIP retrieval accuracy.
+
+Guidelines:
+- Keep the original meaning.
+- Use 3–12 word caption style.
+- Remove chat words (show me, give me, please, etc.)
+- Keep colors, objects, actions.
+- Translate to English if needed.
+- Do NOT add new details.
+
+User Query: %s
+
+Respond with only the rewritten caption.
+""".strip()
+
+
 class QueryTranslator:
     """
     LLM-based Query Rewriter for CLIP-style image caption search.
     Optimised with:
     - Input validation
     - Length control
-    - Early cache check
+    - Bounded, thread-safe LRU cache of LLM rewrites
     - Conversational detection
     - Conditional LLM invocation
     """
@@ -20,40 +63,25 @@ class QueryTranslator:
         try:
             log.info("Initializing QueryTranslator...", model=Config.OPENAI_MODEL)
 
-            self.llm = ChatOpenAI(
-                model=Config.OPENAI_MODEL,
-                temperature=0,
+            self.llm = OpenAI(
+                api_key=Config.OPENAI_API_KEY,
                 timeout=20,
             )
 
-            # 🔹 In-memory cache
-            self._query_cache = {}
+            # 🔹 Bounded in-memory cache of LLM rewrites (thread-safe)
+            self._rewrite_cached = functools.lru_cache(
+                maxsize=Config.TRANSLATION_CACHE_SIZE
+            )(self._rewrite)
+
+            # 🔹 Opaque tokens handed to clients for translations they already have
+            self._tokens: "OrderedDict[str, str]" = OrderedDict()
+            self._tokens_lock = threading.Lock()
 
             # 🔹 Maximum character limit for cost control
             self.MAX_QUERY_LENGTH = 200
 
-            self.prompt_template = PromptTemplate(
-                input_variables=["input_query"],
-                template="""
-You are an expert at rewriting queries for the CLIP image–text model.
-
-Goal:
-Rewrite the user query into a short, concrete, descriptive image caption.
-The rewritten query must maximize CLIP retrieval accuracy.
-
-Guidelines:
-- Keep the original meaning.
-- Use 3–12 word caption style.
-- Remove chat words (show me, give me, please, etc.)
-- Keep colors, objects, actions.
-- Translate to English if needed.
-- Do NOT add new details.
-
-User Query: {input_query}
-
-Respond with only the rewritten caption.
-                """.strip(),
-            )
+            # 🔹 Constant prompt, filled with a single %-substitution per call
+            self._prompt_str = PROMPT_TEMPLATE_STR
 
             log.info("QueryTranslator initialized successfully")
 
@@ -73,10 +101,9 @@ Respond with only the rewritten caption.
 
         log.info("Translating query", input_query=user_query)
 
-        # 2️⃣ Normalisation
+        # 2️⃣ Normalisation + length control (cost protection)
         normalized_query = user_query.strip().lower()
 
-        # 3️⃣ Length control (cost protection)
         if len(normalized_query) > self.MAX_QUERY_LENGTH:
             log.info(
                 "Query truncated due to length limit",
@@ -85,58 +112,62 @@ Respond with only the rewritten caption.
             )
             normalized_query = normalized_query[:self.MAX_QUERY_LENGTH]
 
-        # 4️⃣ 🔥 Early cache check (fastest path)
-        if normalized_query in self._query_cache:
-            log.info(
-                "Cache hit - returning cached translation",
-                query=normalized_query,
-            )
-            return self._query_cache[normalized_query]
-
-        # 5️⃣ Conversational detection
-        CHAT_PATTERNS = [
-            "show me",
-            "please",
-            "give me",
-            "can you",
-            "i want",
-            "find me",
-            "could you",
-        ]
-
-        is_conversational = any(
-            pattern in normalized_query for pattern in CHAT_PATTERNS
-        )
-
-        if not is_conversational:
+        # 3️⃣ Conversational detection
+        if not _CHAT_RE.search(normalized_query):
             log.info("Caption-style query detected - skipping rewrite")
             return normalized_query
 
         log.info("Conversational query detected - rewriting required")
 
-        # 6️⃣ LLM invocation
+        # 4️⃣ Cached LLM invocation (LLM is only hit on a cache miss)
+        return self._rewrite_cached(normalized_query)
+
+    def issue_token(self, translated: str) -> str:
+        """Return an opaque token that resolve_token() maps back to `translated`."""
+
+        token = hashlib.blake2b(translated.encode(), digest_size=16).hexdigest()
+
+        with self._tokens_lock:
+            self._tokens[token] = translated
+            self._tokens.move_to_end(token)
+
+            while len(self._tokens) > Config.TRANSLATION_CACHE_SIZE:
+                self._tokens.popitem(last=False)
+
+        return token
+
+    def resolve_token(self, token: str) -> Optional[str]:
+        """Translation for a token from issue_token(), or None if unknown/evicted."""
+
+        with self._tokens_lock:
+            return self._tokens.get(token)
+
+    def _rewrite(self, normalized_query: str) -> str:
+        """Rewrite a normalised query with the LLM. Wrapped by the LRU cache."""
+
         try:
-            prompt = self.prompt_template.format(
-                input_query=normalized_query
-            )
+            prompt = self._prompt_str % normalized_query
 
             log.info("Sending translation prompt to LLM")
 
-            final_caption = self.llm.invoke(prompt).content.strip()
+            response = self.llm.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+            )
 
-            # 7️⃣ Store result in cache
-            self._query_cache[normalized_query] = final_caption
+            final_caption = (response.choices[0].message.content or "").strip()
 
             log.info(
                 "Translation completed",
-                original=user_query,
+                original=normalized_query,
                 translated=final_caption,
             )
 
             return final_caption
 
         except Exception as e:
-            log.error("LLM translation failed", query=user_query, error=str(e))
+            log.error("LLM translation failed", query=normalized_query, error=str(e))
             raise SemanticImageSearchException(
                 "LLM translation failed", e
             )
@@ -144,13 +175,24 @@ Respond with only the rewritten caption.
 
 # ---- Lazy Singleton ----
 _translator_instance = None
+_translator_lock = threading.Lock()
 
 
-def translate_query(user_query: str) -> str:
+def get_translator() -> QueryTranslator:
     global _translator_instance
     if _translator_instance is None:
-        _translator_instance = QueryTranslator()
-    return _translator_instance.translate(user_query)
+        with _translator_lock:
+            if _translator_instance is None:
+                _translator_instance = QueryTranslator()
+    return _translator_instance
+
+
+def translate_query(user_query: str) -> str:
+    return get_translator().translate(user_query)
+
+
+def resolve_translation_token(token: str) -> Optional[str]:
+    return get_translator().resolve_token(token)
 
 
 
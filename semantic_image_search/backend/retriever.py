@@ -1,7 +1,10 @@
 import uuid
+import functools
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
+import numpy as np
+
 from qdrant_client.http import models
 from PIL import Image
 
@@ -10,11 +13,29 @@ from semantic_image_search.backend.qdrant_manager import QdrantClientManager
 from semantic_image_search.backend.embeddings import (
     embed_text,
     embed_single_image,
+    embed_image_bytes,
 )
 from semantic_image_search.backend.logger import GLOBAL_LOGGER as log
 from semantic_image_search.backend.exception.custom_exception import SemanticImageSearchException
 
 
+@functools.lru_cache(maxsize=Config.TEXT_EMBED_CACHE_SIZE)
+def _encode_caption(caption: str) -> np.ndarray:
+    vector = embed_text(caption)
+    # Cached arrays are shared between requests
+    vector.setflags(write=False)
+    return vector
+
+
+def _encode_text(caption: str) -> np.ndarray:
+    """
+    CLIP text embedding for a query caption, cached on the normalised caption.
+    The CLIP tokenizer lower-cases and collapses whitespace itself, so the
+    normalisation does not change the resulting vector.
+    """
+    return _encode_caption(caption.strip().lower())
+
+
 class ImageSearchService:
     """
     High-level abstraction for semantic image search.
@@ -35,6 +56,17 @@ class ImageSearchService:
             self.collection = Config.QDRANT_COLLECTION
             self.retrieved_root = Config.RETRIEVED_ROOT
 
+            # Search the INT8-quantised vectors, then rescore the
+            # oversampled candidates with the original vectors
+            self.search_params = models.SearchParams(
+                hnsw_ef=Config.QDRANT_HNSW_EF,
+                quantization=models.QuantizationSearchParams(
+                    ignore=False,
+                    rescore=True,
+                    oversampling=Config.QDRANT_QUANTIZATION_OVERSAMPLING,
+                ),
+            )
+
             log.info(
                 "ImageSearchService initialized",
                 collection=self.collection,
@@ -46,6 +78,41 @@ class ImageSearchService:
             raise SemanticImageSearchException("Failed to initialize ImageSearchService", e)
 # The constructor sets up database access, loads required configuration, and ensures the image search service is ready before handling any requests.
 # A collection is the Qdrant container that stores image embeddings and metadata used for search.
+    # ------------------------------------------------------------------
+    # VECTOR SEARCH
+    # ------------------------------------------------------------------
+    def _query(
+        self,
+        vector: np.ndarray,
+        k: int,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+    ):
+        # Construct metadata filter (optional)
+        q_filter = None
+        if metadata_filter:
+            must_conditions = []
+            for key, value in metadata_filter.items():
+                must_conditions.append(
+                    models.FieldCondition(
+                        key=key,
+                        match=models.MatchValue(value=value)
+                    )
+                )
+
+            q_filter = models.Filter(must=must_conditions)
+
+        # Perform vector search (filter uses the category payload index)
+        return self.client.query_points(
+            collection_name=self.collection,
+            query=vector,
+            using="default",
+            query_filter=q_filter,
+            search_params=self.search_params,
+            limit=k,
+            with_payload=True,
+            with_vectors=False
+        )
+
     # ------------------------------------------------------------------
     # TEXT → IMAGE SEARCH
     # ------------------------------------------------------------------
@@ -63,33 +130,10 @@ class ImageSearchService:
         )
 
         try:
-            # Convert text query into embedding vector
-            vector = embed_text(query_text)
-
-            # Construct metadata filter (optional)
-            q_filter = None
-            if metadata_filter:
-                must_conditions = []
-                for key, value in metadata_filter.items():
-                    must_conditions.append(
-                        models.FieldCondition(
-                            key=key,
-                            match=models.MatchValue(value=value)
-                        )
-                    )
+            # Convert text query into embedding vector (cached)
+            vector = _encode_text(query_text)
 
-                q_filter = models.Filter(must=must_conditions)
-
-            # Perform vector search
-            results = self.client.query_points(
-                collection_name=self.collection,
-                query=vector,
-                using="default",
-                query_filter=q_filter,
-                limit=k,
-                with_payload=True,
-                with_vectors=False
-            )
+            results = self._query(vector, k, metadata_filter)
 
             log.info(
                 "Text search completed",
@@ -123,30 +167,7 @@ class ImageSearchService:
             # Convert image into embedding vector
             vector = embed_single_image(image_path)
 
-            # Build filter only if metadata_filter provided
-            q_filter = None
-            if metadata_filter:
-                must_conditions = []
-                for key, value in metadata_filter.items():
-                    must_conditions.append(
-                        models.FieldCondition(
-                            key=key,
-                            match=models.MatchValue(value=value)
-                        )
-                    )
-
-                q_filter = models.Filter(must=must_conditions)
-
-            # Perform vector search
-            results = self.client.query_points(
-                collection_name=self.collection,
-                query=vector,
-                using="default", 
-                query_filter=q_filter, 
-                limit=k,
-                with_payload=True,
-                with_vectors=False
-            )
+            results = self._query(vector, k, metadata_filter)
 
             log.info(
                 "Image search completed",
@@ -160,6 +181,38 @@ class ImageSearchService:
             log.error("Image search failed", image_path=image_path, error=str(e))
             raise SemanticImageSearchException("Image search failed", e)
 
+    def search_by_image_bytes(
+        self,
+        image_bytes: bytes,
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+    ):
+        """Image → image search on an in-memory (e.g. uploaded) image."""
+        log.info(
+            "Image search started",
+            image_bytes=len(image_bytes),
+            top_k=k,
+            filter=metadata_filter
+        )
+
+        try:
+            # Decode and embed straight from memory, no temp file
+            vector = embed_image_bytes(image_bytes)
+
+            results = self._query(vector, k, metadata_filter)
+
+            log.info(
+                "Image search completed",
+                image_bytes=len(image_bytes),
+                total_results=len(results.points)
+            )
+
+            return results
+
+        except Exception as e:
+            log.error("Image search failed", image_bytes=len(image_bytes), error=str(e))
+            raise SemanticImageSearchException("Image search failed", e)
+
     # ------------------------------------------------------------------
     # SAVE RETRIEVED IMAGES LOCALLY
     # ------------------------------------------------------------------